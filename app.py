@@ -1,7 +1,9 @@
+import functools
+import os
+
 import dash
-from dash import Dash, html, dcc, Input, Output
+from dash import Dash, html, dcc, Input, Output, State, ClientsideFunction
 import pandas as pd
-import plotly.graph_objs as go
 import plotly.express as px
 import plotly.colors as pc
 import numpy as np
@@ -11,34 +13,124 @@ GENE_ANNOTATION_PATH = "annotation/testdata/Thalemine_gene_names_demo.csv"
 SEGMENTS_PATH = "annotation/testdata/segments_demo.csv"   # exon + CDS
 EXPR_MEAN_PATH = "annotation/testdata/transcript_expression_mean_demo.csv"
 
-
+# Only the columns the dashboard uses; repeated ids are stored as categories,
+# numbers as 32-bit (halves the bytes moved by every pandas / NumPy operation)
+GENE_COLUMNS = {"AGI": "string", "Name": "string"}
+SEGMENT_COLUMNS = {
+    "gene_id": "category",
+    "transcript_id": "category",
+    "feature": "category",
+    "start": "int32",
+    "end": "int32",
+}
+EXPR_MEAN_COLUMNS = {
+    "transcript_id": "category",
+    "genotype": "category",
+    "timepoint": "category",
+    "mean_TPM": "float32",
+}
+
+
+def load_table(csv_path, columns, sep=","):
+    """
+    Load a table with the given {column: dtype} spec.
+    Prefers an up-to-date Parquet cache next to the CSV
+    (see scripts/cache_parquet.py), otherwise parses the CSV with the
+    pyarrow engine (falls back to the default engine without pyarrow).
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if (
+        os.path.isfile(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return pd.read_parquet(parquet_path, columns=list(columns)).astype(columns)
+
+    try:
+        return pd.read_csv(
+            csv_path, sep=sep, usecols=list(columns), dtype=columns, engine="pyarrow"
+        )
+    except ImportError:
+        return pd.read_csv(csv_path, sep=sep, usecols=list(columns), dtype=columns)
 
 
 # ColorBrewer-like sequential scale (BuPu)
 COLOR_SCALE = px.colors.sequential.BuPu
-
-genes_df = pd.read_csv(GENE_ANNOTATION_PATH, sep=";")
-segments_df = pd.read_csv(SEGMENTS_PATH)
-expr_mean_df = pd.read_csv(EXPR_MEAN_PATH)
+# Normalized expression is quantized to a few color bins, so isoforms that
+# share a bin can be drawn by the same trace
+N_COLOR_BINS = 16
+BIN_COLORS = pc.sample_colorscale(COLOR_SCALE, list(np.linspace(0.0, 1.0, N_COLOR_BINS)))
+
+genes_df = load_table(GENE_ANNOTATION_PATH, GENE_COLUMNS, sep=";")
+segments_df = load_table(SEGMENTS_PATH, SEGMENT_COLUMNS)
+expr_mean_df = load_table(EXPR_MEAN_PATH, EXPR_MEAN_COLUMNS)
+
+# ---- Per-gene lookups (computed once, reused by every callback) ----
+segments_df = segments_df[segments_df["feature"].isin(["exon", "CDS"])]
+segments_df = segments_df.dropna(subset=["gene_id", "transcript_id"])
+
+# Segments as flat NumPy columns (struct of arrays), ordered by
+# gene -> transcript -> start, so each gene is one contiguous slice
+_gene_codes, GENE_IDS = pd.factorize(segments_df["gene_id"].astype(str), sort=True)
+_tx_codes, TX_IDS = pd.factorize(segments_df["transcript_id"].astype(str), sort=True)
+_feature_codes, FEATURES = pd.factorize(segments_df["feature"].astype(str))
+FEATURE_CODE = {name: code for code, name in enumerate(FEATURES)}
+
+_starts = segments_df["start"].to_numpy()
+_order = np.lexsort((_starts, _tx_codes, _gene_codes))
+SEG = {
+    "start": _starts[_order],
+    "end": segments_df["end"].to_numpy()[_order],
+    "feat": _feature_codes.astype(np.int8)[_order],
+    "tx": _tx_codes.astype(np.int32)[_order],
+    "gene": _gene_codes.astype(np.int32)[_order],
+}
+TX_IDS = np.asarray(TX_IDS, dtype=object)
+
+_bounds = np.searchsorted(SEG["gene"], np.arange(len(GENE_IDS) + 1))
+GENE_SLICES = {
+    gid: slice(int(_bounds[i]), int(_bounds[i + 1])) for i, gid in enumerate(GENE_IDS)
+}
+
+# ---- Expression lookup: (genotype, timepoint, transcript_id) -> log1p(mean TPM) ----
+# log1p(mean TPM) for better dynamic range
+expr_mean_df["TPM_log"] = np.log1p(expr_mean_df["mean_TPM"].to_numpy())
+EXPR_LOOKUP = (
+    expr_mean_df.set_index(["genotype", "timepoint", "transcript_id"])["TPM_log"]
+    .sort_index()
+)
 
 # ---- Dropdown 1: genes ----
+# fillna: a missing Name would otherwise turn the whole concatenated label into NA
+gene_labels = (
+    genes_df["AGI"].astype(str) + " – " + genes_df["Name"].fillna("").astype(str)
+).tolist()
 gene_options = [
-    {"label": f"{row['AGI']} – {row['Name']}", "value": row["AGI"]}
-    for _, row in genes_df.iterrows()
+    {"label": label, "value": agi}
+    for label, agi in zip(gene_labels, genes_df["AGI"].tolist())
 ]
 
 # ---- Dropdown 2: conditions (16 = 4 genotypes x 4 timepoints) ----
-cond_df = (
-    expr_mean_df[["genotype", "timepoint"]]
-    .dropna()
-    .drop_duplicates()
-    .copy()
+# condition value -> (genotype, timepoint, label), parsed once
+condition_pairs = (
+    expr_mean_df.groupby(["genotype", "timepoint"], observed=True, sort=False)
+    .size()
+    .index.tolist()
 )
-cond_df["condition"] = cond_df["genotype"] + "_" + cond_df["timepoint"]
-condition_values = sorted(cond_df["condition"].unique())
-condition_options = [{"label": c.replace("_", " • "), "value": c} for c in condition_values]
+CONDITION_META = {f"{g}_{t}": (g, t, f"{g} • {t}") for g, t in condition_pairs}
+condition_values = sorted(CONDITION_META)
+condition_options = [
+    {"label": CONDITION_META[c][2], "value": c} for c in condition_values
+]
 DEFAULT_CONDITION = condition_values[0] if condition_values else None
 
+# Static settings shipped once to the clientside figure builder
+PLOT_CONFIG = {
+    "colorscale": pc.make_colorscale(COLOR_SCALE),
+    "bin_colors": BIN_COLORS,
+    "condition_labels": {c: label for c, (_, _, label) in CONDITION_META.items()},
+    "default_condition": DEFAULT_CONDITION,
+}
+
 # ---- 2) Dash App ----
 app = Dash(__name__)
 
@@ -94,8 +186,29 @@ app.layout = html.Div(
             },
         ),
 
+        # Per-gene payload (server) + static plot settings for the clientside callback
+        dcc.Store(id="gene-store"),
+        dcc.Store(id="plot-config", data=PLOT_CONFIG),
+
         # Output
         html.Div(
+            [
+                html.Div(id="gene-header"),
+                html.Div(
+                    [
+                        html.P(id="condition-label", style={"color": "#555"}),
+                        html.Br(),
+                        dcc.Graph(id="isoform-graph"),
+                        html.P(
+                            "Legend: exon = thin rectangle (lighter), CDS = thicker rectangle, intron = line. "
+                            "Outline is constant black; fill color reflects log1p(mean TPM).",
+                            style={"color": "#666", "fontSize": "13px", "marginTop": "8px"},
+                        ),
+                    ],
+                    id="gene-plot",
+                    style={"display": "none"},
+                ),
+            ],
             id="gene-info",
             style={
                 "backgroundColor": "white",
@@ -113,215 +226,134 @@ app.layout = html.Div(
     },
 )
 
-# ---- Helper: isoform plot (introns + exon thin + CDS thick) ----
-def build_isoform_block_plot(segments_sub, gene_id, tpm_map, tpm_max, condition_label):
-    segments_sub = segments_sub[segments_sub["feature"].isin(["exon", "CDS"])].copy()
-
-    transcripts = sorted(segments_sub["transcript_id"].dropna().unique())
-    y_map = {tid: i for i, tid in enumerate(transcripts)}
-
-    x_min = int(segments_sub["start"].min())
-    x_max = int(segments_sub["end"].max())
-
-    shapes = []
-
-    for tid in transcripts:
-        y = y_map[tid]
-        tdf = segments_sub[segments_sub["transcript_id"] == tid].copy()
-
-        # TPM -> color (normalized)
-        tpm = float(tpm_map.get(tid, 0.0))
-        norm = (tpm / tpm_max) if tpm_max > 0 else 0.0
-        norm = max(0.0, min(1.0, norm))
-        iso_color = pc.sample_colorscale(COLOR_SCALE, norm)[0]
-
-        # EXONS (thin, lighter) - black outline
-        exons = tdf[tdf["feature"] == "exon"].sort_values("start")
-        for _, r in exons.iterrows():
-            shapes.append(
-                dict(
-                    type="rect",
-                    xref="x",
-                    yref="y",
-                    x0=int(r["start"]),
-                    x1=int(r["end"]),
-                    y0=y - 0.10,
-                    y1=y + 0.10,
-                    fillcolor=iso_color,
-                    opacity=0.95,
-                    line=dict(width=1, color="black"),
-                )
-            )
-
-        # INTRONS (lines between exons)
-        exon_coords = exons[["start", "end"]].values
-        for i in range(len(exon_coords) - 1):
-            intron_start = int(exon_coords[i][1])
-            intron_end = int(exon_coords[i + 1][0])
-            shapes.append(
-                dict(
-                    type="line",
-                    xref="x",
-                    yref="y",
-                    x0=intron_start,
-                    x1=intron_end,
-                    y0=y,
-                    y1=y,
-                    line=dict(width=2, color="rgba(0,0,0,0.55)"),
-                )
-            )
-
-        # CDS (thicker, stronger) - black outline
-        cds = tdf[tdf["feature"] == "CDS"].sort_values("start")
-        for _, r in cds.iterrows():
-            shapes.append(
-                dict(
-                    type="rect",
-                    xref="x",
-                    yref="y",
-                    x0=int(r["start"]),
-                    x1=int(r["end"]),
-                    y0=y - 0.18,
-                    y1=y + 0.18,
-                    fillcolor=iso_color,
-                    opacity=0.95,
-                    line=dict(width=1, color="black"),
-                )
-            )
-
-    fig = go.Figure()
-
-    # Dummy marker trace to show colorbar
-    fig.add_trace(
-        go.Scatter(
-            x=[None],
-            y=[None],
-            mode="markers",
-            marker=dict(
-                colorscale=COLOR_SCALE,
-                cmin=0,
-                cmax=max(float(tpm_max), 1e-9),
-                color=[0],
-                showscale=True,
-                colorbar=dict(title=f"log1p(mean TPM)<br>({condition_label})"),
-            ),
-            hoverinfo="skip",
-            showlegend=False,
-        )
-    )
-
-    # Invisible trace to set axes
-    fig.add_trace(
-        go.Scatter(
-            x=[x_min, x_max],
-            y=[0, max(0, len(transcripts) - 1)],
-            mode="markers",
-            opacity=0,
-            showlegend=False,
-            hoverinfo="skip",
-        )
-    )
-
-    fig.update_layout(
-        title=f"Isoform block model: {gene_id}",
-        xaxis_title="Genomic position (bp)",
-        yaxis=dict(
-            title="Transcript isoform",
-            tickmode="array",
-            tickvals=list(y_map.values()),
-            ticktext=list(y_map.keys()),
-            range=[-1, len(transcripts)],
-            tickfont=dict(color="#2F3E4E"),
-        ),
-        shapes=shapes,
-        height=280 + 60 * len(transcripts),
-        margin=dict(l=90, r=30, t=60, b=60),
-        plot_bgcolor="#FAFAF7",
-        paper_bgcolor="white",
-        font=dict(
-            family="system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif",
-            size=14,
-            color="#1F2D3D",
+# ---- Helper: per-gene plot payload (figure is assembled client-side) ----
+def _to_bins(tpm, tpm_max):
+    """
+    Normalize log1p(TPM) by tpm_max (broadcast), clip to [0, 1] and quantize
+    to a color bin index. tpm_max <= 0 maps everything to bin 0.
+    """
+    safe_max = np.where(tpm_max > 0, tpm_max, 1.0)
+    norm = np.where(tpm_max > 0, np.clip(tpm / safe_max, 0.0, 1.0), 0.0)
+    return (norm * (N_COLOR_BINS - 1)).round().astype(np.int32)
+
+
+def _feature_arrays(sl, rows):
+    """
+    Exon / intron / CDS coordinates of one gene slice as flat lists, each
+    segment tagged with the row (isoform index) it is drawn on.
+    """
+    starts = SEG["start"][sl]
+    ends = SEG["end"][sl]
+    feat = SEG["feat"][sl]
+
+    def _part(r, s, e):
+        return {"row": r.tolist(), "start": s.tolist(), "end": e.tolist()}
+
+    is_exon = feat == FEATURE_CODE.get("exon", -1)
+    is_cds = feat == FEATURE_CODE.get("CDS", -1)
+    exon_rows, exon_starts, exon_ends = rows[is_exon], starts[is_exon], ends[is_exon]
+
+    # INTRONS (gaps between consecutive exons of the same isoform)
+    same_row = exon_rows[1:] == exon_rows[:-1]
+
+    return {
+        "exons": _part(exon_rows, exon_starts, exon_ends),
+        "introns": _part(
+            exon_rows[1:][same_row], exon_ends[:-1][same_row], exon_starts[1:][same_row]
         ),
-    )
-
-    fig.update_xaxes(
-        range=[x_min - 50, x_max + 50],
-        showgrid=True,
-        gridcolor="rgba(0,0,0,0.06)",
-        zeroline=False,
-    )
-    fig.update_yaxes(showgrid=False, zeroline=False)
-
-    return fig
-
-
-# ---- 3) Callback ----
+        "cds": _part(rows[is_cds], starts[is_cds], ends[is_cds]),
+    }
+
+
+@functools.lru_cache(maxsize=2048)
+def build_gene_payload(gene_id):
+    """
+    Compact data for one gene, consumed by the clientside figure builder
+    (assets/isoform_plot.js): segment coordinates plus, for every condition,
+    the color bin of each isoform and the colorbar maximum.
+    Cached, so re-selecting a gene skips the lookups.
+    """
+    sl = GENE_SLICES[gene_id]
+
+    # Isoforms in name order; rows = isoform index of every segment
+    gene_tx, rows = np.unique(SEG["tx"][sl], return_inverse=True)
+    transcripts = TX_IDS[gene_tx].tolist()
+    x_min = int(SEG["start"][sl].min())
+    x_max = int(SEG["end"][sl].max())
+
+    # log1p(mean TPM) per condition (rows) x isoform (cols); missing -> 0
+    tpm = np.zeros((len(condition_values), len(transcripts)), dtype=np.float32)
+    for i, condition in enumerate(condition_values):
+        genotype, timepoint, _ = CONDITION_META[condition]
+        try:
+            expr_sub = EXPR_LOOKUP.loc[(genotype, timepoint)]
+        except KeyError:
+            continue
+        tpm[i] = expr_sub.reindex(transcripts, fill_value=0.0).to_numpy()
+
+    # TPM -> color bin for all conditions at once
+    tpm_max = tpm.max(axis=1)
+    bins = _to_bins(tpm, tpm_max[:, None])
+
+    conditions = {
+        condition: {"tpm_max": float(tpm_max[i]), "bins": bins[i].tolist()}
+        for i, condition in enumerate(condition_values)
+    }
+
+    return {
+        "gene_id": gene_id,
+        "transcripts": transcripts,
+        "x_range": [x_min, x_max],
+        **_feature_arrays(sl, rows),
+        "conditions": conditions,
+    }
+
+
+# ---- 3) Callbacks ----
 @app.callback(
-    Output("gene-info", "children"),
+    Output("gene-header", "children"),
+    Output("gene-store", "data"),
     Input("gene-dropdown", "value"),
-    Input("condition-dropdown", "value"),
 )
-def show_gene_info(selected_agi, selected_condition):
-    if selected_condition is None:
-        selected_condition = DEFAULT_CONDITION
-
+def show_gene_info(selected_agi):
     if selected_agi is None:
-        return html.P(
-            "Please select a gene above.",
-            style={"color": "#666", "fontStyle": "italic"},
+        return (
+            html.P(
+                "Please select a gene above.",
+                style={"color": "#666", "fontStyle": "italic"},
+            ),
+            None,
         )
 
-    # Parse condition -> genotype, timepoint
-    genotype, timepoint = selected_condition.split("_", 1)
-    condition_label = selected_condition.replace("_", " • ")
-
     # Gene meta
     row = genes_df.loc[genes_df["AGI"] == selected_agi].iloc[0]
     name = row["Name"]
 
+    header = [
+        html.H3(f"Selected gene: {selected_agi}"),
+        html.P(f"Name / description: {name}"),
+    ]
+
     # Segments for gene
-    sub = segments_df[segments_df["gene_id"] == selected_agi].copy()
-    if sub.empty:
-        return html.Div(
-            [
-                html.H3(f"Selected gene: {selected_agi}"),
-                html.P(f"Name / description: {name}"),
-                html.P("No exon/CDS segments found for this gene.", style={"color": "#aa0000"}),
-            ]
+    if selected_agi not in GENE_SLICES:
+        header.append(
+            html.P("No exon/CDS segments found for this gene.", style={"color": "#aa0000"})
         )
+        return header, None
 
-    transcripts = sorted(sub["transcript_id"].dropna().unique())
-
-    # Expression subset (mean TPM)
-    expr_sub = expr_mean_df[
-        (expr_mean_df["genotype"] == genotype)
-        & (expr_mean_df["timepoint"] == timepoint)
-        & (expr_mean_df["transcript_id"].isin(transcripts))
-    ].copy()
-
-    # log1p(mean TPM) for better dynamic range
-    expr_sub["TPM_log"] = np.log1p(expr_sub["mean_TPM"])
-
-    tpm_map = dict(zip(expr_sub["transcript_id"], expr_sub["TPM_log"]))
-    tpm_max = float(expr_sub["TPM_log"].max()) if not expr_sub.empty else 0.0
+    return header, build_gene_payload(selected_agi)
 
-    fig = build_isoform_block_plot(sub, selected_agi, tpm_map, tpm_max, condition_label)
 
-    return html.Div(
-        [
-            html.H3(f"Selected gene: {selected_agi}"),
-            html.P(f"Name / description: {name}"),
-            html.P(f"Condition: {condition_label}", style={"color": "#555"}),
-            html.Br(),
-            dcc.Graph(figure=fig),
-            html.P(
-                "Legend: exon = thin rectangle (lighter), CDS = thicker rectangle, intron = line. "
-                "Outline is constant black; fill color reflects log1p(mean TPM).",
-                style={"color": "#666", "fontSize": "13px", "marginTop": "8px"},
-            ),
-        ]
-    )
+# Figure assembly runs in the browser: switching condition needs no round trip
+app.clientside_callback(
+    ClientsideFunction(namespace="iso", function_name="build_fig"),
+    Output("isoform-graph", "figure"),
+    Output("gene-plot", "style"),
+    Output("condition-label", "children"),
+    Input("gene-store", "data"),
+    Input("condition-dropdown", "value"),
+    State("plot-config", "data"),
+)
 
 
 if __name__ == "__main__":
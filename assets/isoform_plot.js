@@ -0,0 +1,150 @@
+// Clientside figure builder for the isoform block plot.
+//
+// app.py sends a compact per-gene payload (segment coordinates + color bin
+// of every isoform per condition) into the "gene-store"; this function turns
+// it into the plotly figure for the selected condition in the browser.
+// Exons / CDS are drawn as NaN-separated filled outlines, one trace per
+// color bin; all introns share one line trace.
+
+(function () {
+    const BLACK_LINE = {width: 1, color: "black"};
+    const INTRON_LINE = {width: 2, color: "rgba(0,0,0,0.55)"};
+    const HIDDEN = {display: "none"};
+    const VISIBLE = {display: "block"};
+
+    // Static figure parts, shared by every figure; buildFig only fills in
+    // the per-gene / per-condition fields
+    const BASE_LAYOUT = {
+        margin: {l: 90, r: 30, t: 60, b: 60},
+        plot_bgcolor: "#FAFAF7",
+        paper_bgcolor: "white",
+        font: {
+            family: "system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif",
+            size: 14,
+            color: "#1F2D3D",
+        },
+    };
+    const BASE_XAXIS = {
+        title: {text: "Genomic position (bp)"},
+        showgrid: true,
+        gridcolor: "rgba(0,0,0,0.06)",
+        zeroline: false,
+    };
+    const BASE_YAXIS = {
+        title: {text: "Transcript isoform"},
+        tickmode: "array",
+        tickfont: {color: "#2F3E4E"},
+        showgrid: false,
+        zeroline: false,
+    };
+
+    // Dummy marker trace to show colorbar (colorscale / cmax / title set per figure)
+    const COLORBAR_TRACE = {
+        type: "scatter",
+        x: [null],
+        y: [null],
+        mode: "markers",
+        hoverinfo: "skip",
+        showlegend: false,
+    };
+    const COLORBAR_MARKER = {cmin: 0, color: [0], showscale: true};
+
+    // Closed rectangle outlines (x0,x1,x1,x0,x0) per segment, grouped by color bin
+    function rectOutlinesByBin(seg, bins, halfHeight) {
+        const byBin = {};
+        for (let i = 0; i < seg.row.length; i++) {
+            const y = seg.row[i];
+            const b = bins[y] || 0;
+            const x0 = seg.start[i];
+            const x1 = seg.end[i];
+            const part = byBin[b] || (byBin[b] = {x: [], y: []});
+            part.x.push(x0, x1, x1, x0, x0, NaN);
+            part.y.push(
+                y - halfHeight, y - halfHeight, y + halfHeight, y + halfHeight, y - halfHeight, NaN
+            );
+        }
+        return byBin;
+    }
+
+    function blockTraces(byBin, binColors) {
+        return Object.keys(byBin)
+            .map(Number)
+            .sort(function (a, b) { return a - b; })
+            .map(function (b) {
+                return {
+                    type: "scattergl",
+                    x: byBin[b].x,
+                    y: byBin[b].y,
+                    mode: "lines",
+                    fill: "toself",
+                    fillcolor: binColors[b],
+                    line: BLACK_LINE,
+                    opacity: 0.95,
+                    hoverinfo: "skip",
+                    showlegend: false,
+                };
+            });
+    }
+
+    function intronTrace(introns) {
+        const x = [];
+        const y = [];
+        for (let i = 0; i < introns.row.length; i++) {
+            x.push(introns.start[i], introns.end[i], NaN);
+            y.push(introns.row[i], introns.row[i], NaN);
+        }
+        return {
+            type: "scattergl",
+            x: x,
+            y: y,
+            mode: "lines",
+            line: INTRON_LINE,
+            hoverinfo: "skip",
+            showlegend: false,
+        };
+    }
+
+    function buildFig(gene, condition, config) {
+        if (!gene) {
+            return [{data: [], layout: {}}, HIDDEN, ""];
+        }
+
+        condition = condition || config.default_condition;
+        const label = config.condition_labels[condition] || condition;
+        const n = gene.transcripts.length;
+        const expr = gene.conditions[condition] || {tpm_max: 0, bins: []};
+
+        const colorbarTrace = Object.assign({}, COLORBAR_TRACE, {
+            marker: Object.assign({}, COLORBAR_MARKER, {
+                colorscale: config.colorscale,
+                cmax: Math.max(expr.tpm_max, 1e-9),
+                colorbar: {title: {text: "log1p(mean TPM)<br>(" + label + ")"}},
+            }),
+        });
+
+        // Introns first, then exons (thin), CDS (thick) on top
+        const data = [colorbarTrace, intronTrace(gene.introns)].concat(
+            blockTraces(rectOutlinesByBin(gene.exons, expr.bins, 0.10), config.bin_colors),
+            blockTraces(rectOutlinesByBin(gene.cds, expr.bins, 0.18), config.bin_colors)
+        );
+
+        const layout = Object.assign({}, BASE_LAYOUT, {
+            title: {text: "Isoform block model: " + gene.gene_id},
+            xaxis: Object.assign({}, BASE_XAXIS, {
+                range: [gene.x_range[0] - 50, gene.x_range[1] + 50],
+            }),
+            yaxis: Object.assign({}, BASE_YAXIS, {
+                tickvals: gene.transcripts.map(function (_, i) { return i; }),
+                ticktext: gene.transcripts,
+                range: [-1, n],
+            }),
+            height: 280 + 60 * n,
+        });
+
+        return [{data: data, layout: layout}, VISIBLE, "Condition: " + label];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        iso: {build_fig: buildFig},
+    });
+})();
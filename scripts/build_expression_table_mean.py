@@ -20,21 +20,47 @@ quant.sf naming pattern:
 <genotype>_<timepoint>_<replicate>
 """
 
+from __future__ import annotations
+
 import os
 import re
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
 
 # -------------------------------------------------
 # Core logic
 # -------------------------------------------------
-def build_expression_table(base_dir: str) -> pd.DataFrame:
+def _read_quant(quant_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read one quant.sf and return its (Name, TPM) columns as arrays.
+    Runs in a worker process.
+    """
+    df = pd.read_csv(
+        quant_path,
+        sep="\t",
+        usecols=["Name", "TPM"],
+        dtype={"Name": "string", "TPM": "float32"},
+    )
+    return df["Name"].to_numpy(dtype=object), df["TPM"].to_numpy(dtype=np.float32)
+
+
+def _per_file_categorical(values: list, file_idx: np.ndarray) -> pd.Categorical:
+    """Expand one value per file to one per row without materializing strings."""
+    codes, categories = pd.factorize(pd.Index(values))
+    return pd.Categorical.from_codes(codes[file_idx], categories=categories)
+
+
+def build_expression_table(base_dir: str, max_workers: int | None = None) -> pd.DataFrame:
     """
     Parse all quant.sf files and return transcript-level TPM table
     with replicate information.
+    Files are read in parallel (max_workers processes, default: CPU count);
+    text columns are returned as categoricals.
     """
-    rows = []
+    tasks = []
 
     # folder pattern: genotype_timepoint_rep
     pattern = re.compile(r"^(7ko|7ox|8ox|WT|wt)_([A-Za-z0-9]+)_(\d+)$", re.IGNORECASE)
@@ -54,26 +80,33 @@ def build_expression_table(base_dir: str) -> pd.DataFrame:
             continue
 
         genotype, timepoint, rep = m.groups()
-        rep = int(rep)
-
-        df = pd.read_csv(quant_path, sep="\t")
+        tasks.append((folder, quant_path, genotype, timepoint, int(rep)))
 
-        for _, row in df.iterrows():
-            rows.append(
-                {
-                    "transcript_id": row["Name"],
-                    "TPM": row["TPM"],
-                    "sample": folder,
-                    "genotype": genotype,
-                    "timepoint": timepoint,
-                    "replicate": rep,
-                }
-            )
+    if not tasks:
+        raise RuntimeError(" No quant.sf files found or parsed!")
 
-    expr_df = pd.DataFrame(rows)
+    # map() keeps the (sorted) folder order
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        parts = list(ex.map(_read_quant, [t[1] for t in tasks]))
+
+    # One contiguous typed buffer per column; sample metadata is stored as
+    # categorical codes (file index repeated per row) instead of strings
+    counts = np.array([len(tpm) for _, tpm in parts], dtype=np.int64)
+    file_idx = np.repeat(np.arange(len(tasks)), counts)
+
+    expr_df = pd.DataFrame(
+        {
+            "transcript_id": pd.Categorical(np.concatenate([names for names, _ in parts])),
+            "TPM": np.concatenate([tpm for _, tpm in parts]),
+            "sample": _per_file_categorical([t[0] for t in tasks], file_idx),
+            "genotype": _per_file_categorical([t[2] for t in tasks], file_idx),
+            "timepoint": _per_file_categorical([t[3] for t in tasks], file_idx),
+            "replicate": np.array([t[4] for t in tasks], dtype=np.int8)[file_idx],
+        }
+    )
 
     if expr_df.empty:
-        raise RuntimeError(" No quant.sf files found or parsed!")
+        raise RuntimeError(" All quant.sf files are empty (header only, no transcripts)!")
 
     return expr_df
 
@@ -82,15 +115,16 @@ def compute_mean_tpm(expr_df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute mean TPM across replicates for each transcript / genotype / timepoint.
     """
+    keys = ["transcript_id", "genotype", "timepoint"]
+
+    # Grouping on categorical integer codes is much cheaper than hashing strings
+    df = expr_df[keys + ["TPM"]].astype({key: "category" for key in keys})
+
     mean_df = (
-        expr_df
-        .groupby(
-            ["transcript_id", "genotype", "timepoint"],
-            as_index=False
-        )
-        .agg(
-            mean_TPM=("TPM", "mean")
-        )
+        df
+        .groupby(keys, observed=True, sort=False)["TPM"]
+        .mean()
+        .reset_index(name="mean_TPM")
     )
 
     return mean_df
@@ -116,6 +150,13 @@ def main():
         help="Output directory (default: expression/)",
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes for reading quant.sf files (default: CPU count)",
+    )
+
     args = parser.parse_args()
 
     base_dir = os.path.abspath(args.base_dir)
@@ -130,7 +171,7 @@ def main():
     print(" Output directory:", out_dir)
 
     # ---- Build expression table ----
-    expr_df = build_expression_table(base_dir)
+    expr_df = build_expression_table(base_dir, max_workers=args.jobs)
     expr_df.to_csv(out_expr, index=False)
 
     print(" Saved:", out_expr)
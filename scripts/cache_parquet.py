@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+cache_parquet.py
+
+Write a Parquet copy next to each dashboard input CSV
+(e.g. segments_demo.csv -> segments_demo.parquet).
+
+app.py loads the Parquet file instead of the CSV when it exists and is
+newer than the CSV, which makes app startup much faster on full datasets.
+Text columns are stored as categories (dictionary-encoded), numeric
+columns are downcast (e.g. float64 -> float32, int64 -> int32).
+
+Usage (CLI):
+  python scripts/cache_parquet.py
+  python scripts/cache_parquet.py \
+    --genes annotation/Thalemine_gene_names.csv \
+    --segments annotation/segments_atrtd3.csv \
+    --expr expression/transcript_expression_mean.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+
+def write_parquet_cache(csv_path: str | Path, sep: str = ",") -> Path:
+    """
+    Read a CSV, dictionary-encode its text columns, downcast its numeric
+    columns and write <name>.parquet next to it. Returns the Parquet path.
+    """
+    csv_path = Path(csv_path)
+
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    df = pd.read_csv(csv_path, sep=sep)
+
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="float")
+        else:
+            df[col] = df[col].astype("category")
+
+    out_path = csv_path.with_suffix(".parquet")
+    df.to_parquet(out_path, index=False)
+
+    return out_path
+
+
+def _cli() -> int:
+    parser = argparse.ArgumentParser(
+        description="Cache the dashboard input CSVs as Parquet files"
+    )
+    parser.add_argument(
+        "--genes",
+        default="annotation/testdata/Thalemine_gene_names_demo.csv",
+        help="Gene annotation CSV (';'-separated)",
+    )
+    parser.add_argument(
+        "--segments",
+        default="annotation/testdata/segments_demo.csv",
+        help="Exon/CDS segments CSV",
+    )
+    parser.add_argument(
+        "--expr",
+        default="annotation/testdata/transcript_expression_mean_demo.csv",
+        help="Mean TPM expression CSV",
+    )
+
+    args = parser.parse_args()
+
+    for csv_path, sep in ((args.genes, ";"), (args.segments, ","), (args.expr, ",")):
+        out_path = write_parquet_cache(csv_path, sep=sep)
+        print(f"Saved: {out_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
@@ -42,12 +42,12 @@ def main():
         )
 
     # ---- 3) get all transcripts from these segments ----
-    transcripts_keep = sorted(segments_demo["transcript_id"].dropna().unique())
+    transcripts_keep = frozenset(segments_demo["transcript_id"].dropna().unique())
 
     # ---- 4) expression mean subset for only 2 conditions + those transcripts ----
-    cond_mask = False
-    for g, t in CONDITIONS_KEEP:
-        cond_mask = cond_mask | ((expr_mean_df["genotype"] == g) & (expr_mean_df["timepoint"] == t))
+    # one pass over (genotype, timepoint) pairs instead of one mask per condition
+    cond_idx = pd.MultiIndex.from_arrays([expr_mean_df["genotype"], expr_mean_df["timepoint"]])
+    cond_mask = cond_idx.isin(CONDITIONS_KEEP)
 
     expr_demo = expr_mean_df[cond_mask & expr_mean_df["transcript_id"].isin(transcripts_keep)].copy()
 
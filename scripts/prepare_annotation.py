@@ -17,36 +17,39 @@ Importable:
 from __future__ import annotations
 
 import argparse
-import re
+import gzip
 from pathlib import Path
-from typing import Optional
 
 import pandas as pd
 
 
-GTF_COLS = [
-    "chrom", "source", "feature", "start", "end",
-    "score", "strand", "frame", "attribute",
+SEGMENT_COLS = [
+    "chrom", "gene_id", "transcript_id", "feature", "start", "end", "strand", "exon_number",
 ]
 
 
-_ATTR_CACHE: dict[tuple[str, str], Optional[str]] = {}
-
-
-def parse_attr(attr_str: str, key: str) -> Optional[str]:
+def _attr_value(attr: str, key: str) -> str | None:
     """
-    Parse a GTF attributes string and return the value for a given key.
+    Return the value of `key` in a GTF attribute string, without regex.
     Example attribute chunk: gene_id "AT1G01010"; transcript_id "AT1G01010.1";
+    Values may be quoted or bare (e.g. exon_number 1;).
     """
-    s = str(attr_str)
-    cache_key = (s, key)
-    if cache_key in _ATTR_CACHE:
-        return _ATTR_CACHE[cache_key]
+    token = key + " "
+    i = attr.find(token)
+    # skip matches inside longer keys (e.g. "ref_gene_id" for "gene_id")
+    while i > 0 and attr[i - 1] not in " ;":
+        i = attr.find(token, i + 1)
+    if i < 0:
+        return None
+
+    i += len(token)
+    if attr.startswith('"', i):
+        j = attr.find('"', i + 1)
+        return attr[i + 1:j] if j > i + 1 else None
 
-    m = re.search(rf'{re.escape(key)} "([^"]+)"', s)
-    val = m.group(1) if m else None
-    _ATTR_CACHE[cache_key] = val
-    return val
+    j = attr.find(";", i)
+    value = (attr[i:] if j < 0 else attr[i:j]).strip()
+    return value or None
 
 
 def build_segments_df(
@@ -59,41 +62,59 @@ def build_segments_df(
 
     - Keeps only exon + CDS by default.
     - exon_number is nullable Int64 (CDS lines may not always have it).
+    - Single streaming pass: rows are filtered by feature before their
+      attributes are parsed, so other GTF lines are never materialized.
     """
     gtf_path = Path(gtf_path)
 
     if not gtf_path.exists():
         raise FileNotFoundError(f"GTF not found: {gtf_path}")
 
-    gtf = pd.read_csv(
-        gtf_path,
-        sep="\t",
-        comment="#",
-        header=None,
-        names=GTF_COLS,
-        dtype={"chrom": "string", "source": "string", "feature": "string", "attribute": "string"},
-        low_memory=False,
-    )
-
-    segments = gtf[gtf["feature"].isin(list(keep_features))].copy()
-
-    # Extract attributes
-    segments["gene_id"] = segments["attribute"].map(lambda s: parse_attr(s, "gene_id"))
-    segments["transcript_id"] = segments["attribute"].map(lambda s: parse_attr(s, "transcript_id"))
-    segments["exon_number"] = segments["attribute"].map(lambda s: parse_attr(s, "exon_number"))
-
-    # Clean types
-    segments = segments.dropna(subset=["gene_id", "transcript_id"]).copy()
-    segments["start"] = segments["start"].astype(int)
-    segments["end"] = segments["end"].astype(int)
-
-    # exon_number can be missing -> nullable integer
-    segments["exon_number"] = pd.to_numeric(segments["exon_number"], errors="coerce").astype("Int64")
-
-    # Keep only relevant columns (and in consistent order)
-    segments = segments[
-        ["chrom", "gene_id", "transcript_id", "feature", "start", "end", "strand", "exon_number"]
-    ]
+    keep = frozenset(keep_features)
+    rows = []
+
+    # GTFs are often distributed gzipped (.gtf.gz)
+    if gtf_path.suffix == ".gz":
+        fh_ctx = gzip.open(gtf_path, "rt")
+    else:
+        fh_ctx = gtf_path.open()
+
+    with fh_ctx as fh:
+        for line in fh:
+            if line.startswith("#"):
+                continue
+
+            # chrom, source, feature, start, end, score, strand, frame, attribute
+            parts = line.rstrip("\n").split("\t", 8)
+            if len(parts) < 9 or parts[2] not in keep:
+                continue
+
+            attr = parts[8]
+            gene_id = _attr_value(attr, "gene_id")
+            transcript_id = _attr_value(attr, "transcript_id")
+            if gene_id is None or transcript_id is None:
+                continue
+
+            # exon_number can be missing / non-numeric -> NA
+            exon_number = _attr_value(attr, "exon_number")
+            if exon_number is not None and not exon_number.isdigit():
+                exon_number = None
+
+            rows.append(
+                (
+                    parts[0],
+                    gene_id,
+                    transcript_id,
+                    parts[2],
+                    int(parts[3]),
+                    int(parts[4]),
+                    parts[6],
+                    None if exon_number is None else int(exon_number),
+                )
+            )
+
+    segments = pd.DataFrame.from_records(rows, columns=SEGMENT_COLS)
+    segments = segments.astype({"start": "int32", "end": "int32", "exon_number": "Int64"})
 
     # sort for nicer diffs / reproducibility
     segments = segments.sort_values(